@@ -4,7 +4,36 @@ PowerPoint Analysis Script - Extract and display all text content for review
 from pptx import Presentation
 from pptx.util import Inches, Pt, Emu
 from pptx.enum.text import PP_ALIGN
+from lxml import etree
 import json
+import posixpath
+import zipfile
+
+# OOXML namespaces used when reading slide parts directly
+_NS = {
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+}
+_A_T = f"{{{_NS['a']}}}t"
+_A_BR = f"{{{_NS['a']}}}br"
+_A_P = f"{{{_NS['a']}}}p"
+_P_CNVPR = f"{{{_NS['p']}}}cNvPr"
+_P_SP = f"{{{_NS['p']}}}sp"
+_P_TXBODY = f"{{{_NS['p']}}}txBody"
+_P_GRAPHICFRAME = f"{{{_NS['p']}}}graphicFrame"
+_P_GRPSP = f"{{{_NS['p']}}}grpSp"
+_TBL_PATH = f"{{{_NS['a']}}}graphic/{{{_NS['a']}}}graphicData/{{{_NS['a']}}}tbl"
+# Where a shape's own transform lives: sp/pic/cxnSp, grpSp, graphicFrame
+_XFRM_PATHS = (
+    f"{{{_NS['p']}}}spPr/{{{_NS['a']}}}xfrm",
+    f"{{{_NS['p']}}}grpSpPr/{{{_NS['a']}}}xfrm",
+    f"{{{_NS['p']}}}xfrm",
+)
+_A_OFF = f"{{{_NS['a']}}}off"
+_A_EXT = f"{{{_NS['a']}}}ext"
+# Placeholder marker under any shape's non-visual properties (nvSpPr, nvPicPr, ...)
+_PH_PATH = f"*/{{{_NS['p']}}}nvPr/{{{_NS['p']}}}ph"
 
 def get_alignment_name(alignment):
     """Convert alignment enum to readable name"""
@@ -19,41 +48,128 @@ def get_alignment_name(alignment):
     }
     return alignment_map.get(alignment, str(alignment))
 
-def analyze_shape(shape, shape_idx):
-    """Analyze a single shape and return its properties"""
+def get_shape_kind(shape):
+    """
+    Return (has_text_frame, has_table) for a shape, decided once from its XML
+    element instead of through separate python-pptx property lookups
+    """
+    elt = shape._element
+    if elt.tag == _P_SP:
+        return elt.find(_P_TXBODY) is not None, False
+    if elt.tag == _P_GRAPHICFRAME:
+        return False, elt.find(_TBL_PATH) is not None
+    return False, False
+
+def iter_text_frames(shapes):
+    """
+    Yield (shape, text_frame) for every text frame among shapes: text shapes,
+    each cell of a table (paired with the table's graphic frame) and the
+    members of groups, however deeply nested
+    """
+    for shape in shapes:
+        if shape._element.tag == _P_GRPSP:
+            yield from iter_text_frames(shape.shapes)
+            continue
+        has_text_frame, has_table = get_shape_kind(shape)
+        if has_text_frame:
+            yield shape, shape.text_frame
+        elif has_table:
+            for row in shape.table.rows:
+                for cell in row.cells:
+                    yield shape, cell.text_frame
+
+def get_shape_geometry(shape):
+    """
+    Return (left, top, width, height) in EMUs from one lookup of the shape's
+    xfrm element. Placeholders that inherit their position from the layout
+    have no xfrm of their own and fall back to the python-pptx properties.
+    """
+    elt = shape._element
+    for path in _XFRM_PATHS:
+        xfrm = elt.find(path)
+        if xfrm is not None:
+            off = xfrm.find(_A_OFF)
+            ext = xfrm.find(_A_EXT)
+            if off is not None and ext is not None:
+                return (Emu(int(off.get("x"))), Emu(int(off.get("y"))),
+                        Emu(int(ext.get("cx"))), Emu(int(ext.get("cy"))))
+            break
+    return shape.left, shape.top, shape.width, shape.height
+
+_TITLE_PLACEHOLDERS = ("title", "ctrTitle")
+
+def is_title_shape(shape):
+    """
+    True if the shape is a title placeholder, whatever it has been renamed to.
+    Reads the <p:ph> type straight from the XML instead of building
+    python-pptx placeholder objects for every shape.
+    """
+    ph = shape._element.find(_PH_PATH)
+    return ph is not None and ph.get("type") in _TITLE_PLACEHOLDERS
+
+RUN_COLUMNS = ("slide_idx", "shape_idx", "para_idx", "text", "bold", "italic", "size", "font_name")
+
+def new_run_table():
+    """Run-level text and formatting stored as parallel column lists, one entry per run"""
+    return {column: [] for column in RUN_COLUMNS}
+
+def add_run(runs, slide_idx, shape_idx, para_idx, run):
+    """Append one run's details to a run table"""
+    font = run.font
+    runs["slide_idx"].append(slide_idx)
+    runs["shape_idx"].append(shape_idx)
+    runs["para_idx"].append(para_idx)
+    runs["text"].append(run.text)
+    runs["bold"].append(font.bold)
+    runs["italic"].append(font.italic)
+    runs["size"].append(font.size.pt if font.size else None)
+    runs["font_name"].append(font.name)
+
+def run_rows(runs, start, stop):
+    """Iterate (text, bold, italic, size, font_name) for runs start..stop of a run table"""
+    return zip(runs["text"][start:stop], runs["bold"][start:stop], runs["italic"][start:stop],
+               runs["size"][start:stop], runs["font_name"][start:stop])
+
+def analyze_shape(shape, shape_idx, slide_idx=0, runs=None):
+    """
+    Analyze a single shape and return its properties.
+    Run details are appended to the runs table (a new one kept in info["runs"]
+    if none is given) and each paragraph records its run_range there.
+    """
+    left, top, width, height = get_shape_geometry(shape)
     info = {
         "index": shape_idx,
         "name": shape.name,
         "type": type(shape).__name__,
-        "left": shape.left,
-        "top": shape.top,
-        "width": shape.width,
-        "height": shape.height,
+        "left": left,
+        "top": top,
+        "width": width,
+        "height": height,
     }
+    if runs is None:
+        runs = info["runs"] = new_run_table()
+    
+    has_text_frame, has_table = get_shape_kind(shape)
     
-    if shape.has_text_frame:
+    if has_text_frame:
         info["has_text"] = True
         info["paragraphs"] = []
-        for para_idx, para in enumerate(shape.text_frame.paragraphs):
-            para_info = {
-                "index": para_idx,
-                "text": para.text,
-                "alignment": get_alignment_name(para.alignment),
-                "level": para.level,
-                "runs": []
-            }
-            for run_idx, run in enumerate(para.runs):
-                run_info = {
-                    "text": run.text,
-                    "bold": run.font.bold,
-                    "italic": run.font.italic,
-                    "size": run.font.size.pt if run.font.size else None,
-                    "font_name": run.font.name,
+        # Skip blank frames (e.g. empty placeholders) without building paragraph/run objects
+        if any((t.text or "").strip() for t in shape._element.iter(_A_T)):
+            for para_idx, para in enumerate(shape.text_frame.paragraphs):
+                para_info = {
+                    "index": para_idx,
+                    "text": para.text,
+                    "alignment": get_alignment_name(para.alignment),
+                    "level": para.level,
                 }
-                para_info["runs"].append(run_info)
-            info["paragraphs"].append(para_info)
+                start = len(runs["text"])
+                for run in para.runs:
+                    add_run(runs, slide_idx, shape_idx, para_idx, run)
+                para_info["run_range"] = (start, len(runs["text"]))
+                info["paragraphs"].append(para_info)
     
-    if shape.has_table:
+    if has_table:
         info["has_table"] = True
         info["table_data"] = []
         for row_idx, row in enumerate(shape.table.rows):
@@ -72,7 +188,8 @@ def analyze_presentation(pptx_path):
         "slide_width": prs.slide_width,
         "slide_height": prs.slide_height,
         "slide_count": len(prs.slides),
-        "slides": []
+        "slides": [],
+        "runs": new_run_table()
     }
     
     for slide_idx, slide in enumerate(prs.slides):
@@ -88,13 +205,61 @@ def analyze_presentation(pptx_path):
             slide_info["notes"] = notes_text
         
         for shape_idx, shape in enumerate(slide.shapes):
-            shape_info = analyze_shape(shape, shape_idx)
+            shape_info = analyze_shape(shape, shape_idx, slide_idx, analysis["runs"])
             slide_info["shapes"].append(shape_info)
         
         analysis["slides"].append(slide_info)
     
     return analysis
 
+def _slide_part_names(zf):
+    """Return the slide part names in presentation order"""
+    rels = etree.parse(zf.open("ppt/_rels/presentation.xml.rels")).getroot()
+    targets = {rel.get("Id"): rel.get("Target") for rel in rels}
+    pres = etree.parse(zf.open("ppt/presentation.xml")).getroot()
+    
+    names = []
+    for sld_id in pres.iterfind("p:sldIdLst/p:sldId", _NS):
+        target = targets[sld_id.get(f"{{{_NS['r']}}}id")]
+        if target.startswith("/"):
+            names.append(target[1:])
+        else:
+            names.append(posixpath.normpath(posixpath.join("ppt", target)))
+    return names
+
+def fast_extract_texts(pptx_path):
+    """
+    Extract paragraph text from every slide without building python-pptx objects.
+    Streams each slide's XML with iterparse and returns the same
+    {"slide", "shape", "text"} records as print_text_content (table cells included).
+    """
+    texts = []
+    
+    with zipfile.ZipFile(pptx_path) as zf:
+        for slide_num, name in enumerate(_slide_part_names(zf), start=1):
+            shape_name = ""
+            parts = []
+            with zf.open(name) as f:
+                for _, elem in etree.iterparse(f, events=("end",), tag=(_P_CNVPR, _A_T, _A_BR, _A_P)):
+                    if elem.tag == _A_T:
+                        parts.append(elem.text or "")
+                    elif elem.tag == _A_BR:
+                        parts.append("\v")
+                    elif elem.tag == _A_P:
+                        text = "".join(parts)
+                        parts = []
+                        if text.strip():
+                            texts.append({
+                                "slide": slide_num,
+                                "shape": shape_name,
+                                "text": text
+                            })
+                    else:
+                        shape_name = elem.get("name", "")
+                    elem.clear()
+    
+    return texts
+
 def print_text_content(analysis):
     """Print all text content in a readable format"""
     print("=" * 80)
@@ -121,6 +286,8 @@ def print_text_content(analysis):
                     print(f"\n  Shape: {shape['name']} (Type: {shape['type']})")
                     print(f"  Position: left={shape['left']}, top={shape['top']}")
                     print(f"  Size: width={shape['width']}, height={shape['height']}")
+                    # Shapes analyzed on their own carry their own run table
+                    runs = shape.get("runs") or analysis["runs"]
                     for para in shape["paragraphs"]:
                         if para["text"].strip():
                             print(f"    [{para['alignment']}, Level {para['level']}] \"{para['text']}\"")
@@ -129,11 +296,10 @@ def print_text_content(analysis):
                                 "shape": shape["name"],
                                 "text": para["text"]
                             })
-                            if para["runs"]:
-                                for run in para["runs"]:
-                                    if run["text"].strip():
-                                        font_info = f"Font: {run['font_name']}, Size: {run['size']}, Bold: {run['bold']}, Italic: {run['italic']}"
-                                        print(f"      Run: \"{run['text']}\" | {font_info}")
+                            for text, bold, italic, size, font_name in run_rows(runs, *para["run_range"]):
+                                if text.strip():
+                                    font_info = f"Font: {font_name}, Size: {size}, Bold: {bold}, Italic: {italic}"
+                                    print(f"      Run: \"{text}\" | {font_info}")
             
             if shape.get("has_table"):
                 print(f"\n  Table in {shape['name']}:")
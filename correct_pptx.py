@@ -3,6 +3,10 @@ PowerPoint Correction Script - Fix spelling, grammar, and alignment issues
 """
 from pptx import Presentation
 from pptx.util import Emu
+from analyze_pptx import is_title_shape
+from collections import Counter
+import functools
+import io
 import re
 import os
 
@@ -29,43 +33,106 @@ SPELLING_CORRECTIONS = {
     r'\bthe\s+the\b': 'the',
 }
 
+# Patterns are compiled once at import time. Entries that are a single literal
+# word (\bword\b) are matched in one scan by _WORDS, where the named group that
+# matched (w0, w1, ...) indexes into _KEYS; the remaining phrase patterns ("that
+# that", "the the") run afterwards so they also catch doubled words produced by
+# a word fix.
+_KEYS = list(SPELLING_CORRECTIONS.items())
+_WORD_FIXES = {}  # word -> index into _KEYS
+_PHRASE_FIXES = []  # (index into _KEYS, compiled pattern)
+for _idx, (_pattern, _) in enumerate(_KEYS):
+    _literal = re.fullmatch(r'\\b([a-z]+)\\b', _pattern)
+    if _literal:
+        _WORD_FIXES[_literal.group(1)] = _idx
+    else:
+        _PHRASE_FIXES.append((_idx, re.compile(_pattern, re.IGNORECASE)))
+_WORDS = re.compile(r'\b(?:' + '|'.join(
+    f'(?P<w{_WORD_FIXES[w]}>{w})' for w in sorted(_WORD_FIXES, key=len, reverse=True)
+) + r')\b', re.IGNORECASE)
+
+# 3+ same characters ending a word (like "testttt"). The run is matched
+# directly rather than by backtracking over the word's prefix.
+_REPEATED = re.compile(r'([a-zA-Z])\1{2,}\b')
+
+# Common endings that should keep a double letter when collapsing a repeat
+_ENDING_MAP = {'s': 'ss', 't': 'tt', 'e': 'ee', 'l': 'll'}
+
+def _fix_repeated(match):
+    char = match.group(1)
+    return _ENDING_MAP.get(char, char)
+
+# One scan that finds anything the fixes above could change. Most runs are
+# clean, so they are rejected here without running each pass.
+_TRIGGER = re.compile('|'.join(
+    [r'\b(?:' + '|'.join(_WORD_FIXES) + r')\b'] + [p.pattern for _, p in _PHRASE_FIXES] + [r'([a-zA-Z])\1\1']
+), re.IGNORECASE)
+
 def simple_spell_check(text):
     """
     Simple spell check using regex patterns
     Returns corrected text and list of corrections made
     """
-    corrections = []
+    text, corrections = _spell_check_cached(text)
+    return text, list(corrections)
+
+@functools.lru_cache(maxsize=8192)
+def _spell_check_cached(text):
+    """
+    Cached core of simple_spell_check. Titles and boilerplate repeat across
+    slides, so identical run texts are only checked once.
+    Returns corrected text and a tuple of corrections made
+    """
+    if not _TRIGGER.search(text):
+        return text, ()
+    
     original = text
+    matched = set()
+    
+    def replace_word(match):
+        idx = int(match.lastgroup[1:])
+        matched.add(idx)
+        return _KEYS[idx][1]
     
-    # Apply all known corrections
-    for pattern, replacement in SPELLING_CORRECTIONS.items():
-        new_text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    # Apply all single-word corrections in one scan, then the phrase patterns
+    text = _WORDS.sub(replace_word, text)
+    for idx, pattern in _PHRASE_FIXES:
+        new_text = pattern.sub(_KEYS[idx][1], text)
         if new_text != text:
-            corrections.append(f"'{pattern}' -> '{replacement}'")
+            matched.add(idx)
             text = new_text
     
     # Fix obvious repeated character typos (like "testttt" -> "test")
-    # Pattern: word ending with 3+ same characters
-    repeated_pattern = r'\b(\w*?)([a-zA-Z])\2{2,}\b'
-    
-    def fix_repeated(match):
-        prefix = match.group(1)
-        char = match.group(2)
-        # Common endings that should have double letters
-        for ending in ['ss', 's', 'tt', 't', 'ee', 'e', 'll', 'l']:
-            if ending[0] == char:
-                return prefix + ending
-        return prefix + char
-    
-    new_text = re.sub(repeated_pattern, fix_repeated, text)
-    if new_text != text:
-        corrections.append(f"Fixed repeated characters")
-        text = new_text
-    
-    if text != original:
-        corrections.insert(0, f"'{original}' -> '{text}'")
-    
-    return text, corrections
+    new_text = _REPEATED.sub(_fix_repeated, text)
+    repeated_fixed = new_text != text
+    text = new_text
+    
+    if text == original:
+        return text, ()
+    
+    corrections = [f"'{original}' -> '{text}'"]
+    corrections.extend(f"'{_KEYS[i][0]}' -> '{_KEYS[i][1]}'" for i in sorted(matched))
+    if repeated_fixed:
+        corrections.append("Fixed repeated characters")
+    
+    return text, tuple(corrections)
+
+def save_presentation(prs, output_path):
+    """
+    Save the presentation to memory first, then write it in one go and
+    atomically replace output_path so a failed save never leaves a partial file
+    """
+    buf = io.BytesIO()
+    prs.save(buf)
+    tmp_path = f"{output_path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(buf.getbuffer())
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 def get_title_placeholder_positions(prs):
     """Analyze title positions across all slides"""
@@ -73,7 +140,7 @@ def get_title_placeholder_positions(prs):
     
     for slide_idx, slide in enumerate(prs.slides):
         for shape in slide.shapes:
-            if "Title" in shape.name:
+            if is_title_shape(shape):
                 title_positions.append({
                     "slide": slide_idx + 1,
                     "shape_name": shape.name,
@@ -90,14 +157,8 @@ def find_most_common_position(positions):
     if not positions:
         return None
     
-    left_counts = {}
-    for pos in positions:
-        left = pos["left"]
-        left_counts[left] = left_counts.get(left, 0) + 1
-    
     # Return the most common position
-    most_common = max(left_counts.items(), key=lambda x: x[1])
-    return most_common[0]
+    return Counter(pos["left"] for pos in positions).most_common(1)[0][0]
 
 def correct_presentation(input_path, output_path):
     """Main function to correct the presentation"""
@@ -119,7 +180,7 @@ def correct_presentation(input_path, output_path):
         
         for shape in slide.shapes:
             # Fix title alignment
-            if "Title" in shape.name and standard_left is not None:
+            if standard_left is not None and is_title_shape(shape):
                 if shape.left != standard_left:
                     old_left = shape.left
                     shape.left = standard_left
@@ -141,27 +202,25 @@ def correct_presentation(input_path, output_path):
                                     all_corrections.append(msg)
                                     print(f"  Text fix: {c}")
             
-            # Fix table content
+            # Fix table content, checking each run once
             if shape.has_table:
                 for row_idx, row in enumerate(shape.table.rows):
                     for cell_idx, cell in enumerate(row.cells):
-                        if cell.text.strip():
-                            original = cell.text
-                            corrected, corrections = simple_spell_check(cell.text)
-                            
-                            if corrected != original:
-                                # Need to update the text frame
-                                for para in cell.text_frame.paragraphs:
-                                    for run in para.runs:
-                                        run.text, _ = simple_spell_check(run.text)
-                                for c in corrections:
-                                    msg = f"Slide {slide_num}, Table[{row_idx},{cell_idx}]: {c}"
-                                    all_corrections.append(msg)
-                                    print(f"  Table fix: {c}")
+                        for para in cell.text_frame.paragraphs:
+                            for run in para.runs:
+                                if run.text.strip():
+                                    corrected, corrections = simple_spell_check(run.text)
+                                    
+                                    if corrections:
+                                        run.text = corrected
+                                        for c in corrections:
+                                            msg = f"Slide {slide_num}, Table[{row_idx},{cell_idx}]: {c}"
+                                            all_corrections.append(msg)
+                                            print(f"  Table fix: {c}")
     
     # Save the corrected presentation
     print(f"\nSaving corrected presentation to: {output_path}")
-    prs.save(output_path)
+    save_presentation(prs, output_path)
     
     return all_corrections
 
@@ -11,26 +11,61 @@ Requires: OPENAI_API_KEY in .env file or environment variable
 """
 
 import os
-import json
+import logging
+import logging.handlers
+import queue
 import re
+import shelve
+import threading
+import sys
+import asyncio
+import atexit
+import hashlib
+import importlib.resources
+import inspect
+import orjson
+from collections import Counter, deque
 from typing import Any, Callable
 from dataclasses import dataclass, field
 from enum import Enum
 from dotenv import load_dotenv
 from pptx import Presentation
 from pptx.util import Emu, Pt
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DEFAULT_CONNECTION_LIMITS
+try:
+    from symspellpy import SymSpell, Verbosity
+except ImportError:  # Optional: without it every text is sent to the model
+    SymSpell = None
+from analyze_pptx import get_shape_geometry, get_shape_kind, is_title_shape, iter_text_frames
+from correct_pptx import save_presentation
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+
+def _dumps(obj: Any) -> str:
+    """Serialize to a compact JSON string; orjson encodes in C and returns bytes"""
+    return orjson.dumps(obj).decode()
+
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 MODEL = "gpt-4o"  # Can change to "gpt-4-turbo" or "gpt-4"
 MAX_ITERATIONS = 20  # Maximum agent loop iterations
-VERBOSE = True  # Print agent reasoning
+HISTORY_WINDOW = 20  # Messages sent per agent turn; older tool results are summarized
+VERBOSE = True  # Log agent reasoning (tool calls, arguments and results)
+BATCH_CHAR_BUDGET = 16000  # ~4k input tokens of text per batched analysis request
+ANALYSIS_WORKERS = 8  # Analysis requests in flight at once; the deck's text is spread across them
+BATCH_POLL_SECONDS = 30  # How often run_agent_batch checks on an OpenAI Batch API job
+# Analysis results are kept here across runs so re-reviews skip unchanged text (None disables)
+ANALYSIS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "pptxreview", "analysis.db")
+# Skip the model for texts a local dictionary finds clean (needs symspellpy). Off by
+# default: grammar mistakes made of real words ("He go to school") are then never checked.
+LOCAL_SPELLCHECK = False
 
 
 # ============================================================================
@@ -64,22 +99,46 @@ class AgentState:
     slides_content: list[SlideContent] = field(default_factory=list)
     pending_corrections: list[Correction] = field(default_factory=list)
     applied_corrections: list[Correction] = field(default_factory=list)
+    correction_keys: set[tuple[int, str, str]] = field(default_factory=set)  # (slide, shape, original) queued so far
+    found_errors: list[dict] = field(default_factory=list)  # Errors from the latest analyze_all_texts call
     current_task: str = "analyze"
     iteration: int = 0
     is_complete: bool = False
-    messages: list[dict] = field(default_factory=list)
+    prompt: list[dict] = field(default_factory=list)  # System prompt and initial request, always sent
+    messages: deque = field(default_factory=deque)  # Conversation since the prompt, trimmed to a window
+    history_trimmed: bool = False  # Older messages were dropped; a summary stands in for them
+    presentation: Any = None  # Opened Presentation, shared by all tools
+
+
+class AgentDone(Exception):
+    """Raised by mark_complete to end the agent loop; carries the tool's result"""
+    
+    def __init__(self, result: dict):
+        super().__init__(result)
+        self.result = result
 
 
 # ============================================================================
 # TOOLS - Functions the agent can call
 # ============================================================================
 
+def _get_prs(state: AgentState):
+    """
+    Return the presentation for this run, opening it on first use.
+    Tools share the one object so the .pptx is unzipped and parsed only once;
+    corrections applied to it carry over to later tool calls.
+    """
+    if state.presentation is None:
+        state.presentation = Presentation(state.presentation_path)
+    return state.presentation
+
+
 def tool_extract_slide_content(state: AgentState) -> dict:
     """
     Extract all text content from the presentation for analysis.
     Returns structured data about each slide's content.
     """
-    prs = Presentation(state.presentation_path)
+    prs = _get_prs(state)
     state.slides_content = []
     
     result = {"slides": [], "total_slides": len(prs.slides)}
@@ -99,16 +158,18 @@ def tool_extract_slide_content(state: AgentState) -> dict:
         
         # Extract shape content
         for shape in slide.shapes:
+            left, top, width, height = get_shape_geometry(shape)
             shape_info = {
                 "name": shape.name,
-                "left": shape.left,
-                "top": shape.top,
-                "width": shape.width,
-                "height": shape.height,
+                "left": left,
+                "top": top,
+                "width": width,
+                "height": height,
                 "text_content": []
             }
+            has_text_frame, has_table = get_shape_kind(shape)
             
-            if shape.has_text_frame:
+            if has_text_frame:
                 for para in shape.text_frame.paragraphs:
                     if para.text.strip():
                         para_info = {
@@ -119,7 +180,7 @@ def tool_extract_slide_content(state: AgentState) -> dict:
                         }
                         shape_info["text_content"].append(para_info)
             
-            if shape.has_table:
+            if has_table:
                 shape_info["table"] = []
                 for row in shape.table.rows:
                     row_data = [cell.text for cell in row.cells]
@@ -138,14 +199,169 @@ def tool_extract_slide_content(state: AgentState) -> dict:
     return result
 
 
-def tool_analyze_text_for_errors(state: AgentState, slide_number: int, text: str) -> dict:
+# Analysis results keyed by blake2b digest of the model and text, shared by the
+# single and batched analysis tools so texts seen earlier in the run (or
+# repeated across slides) are not sent again. The dict fronts a shelve file at
+# ANALYSIS_CACHE_PATH so verdicts also carry over to later runs.
+_ANALYSIS_CACHE: dict[str, dict] = {}
+_ANALYSIS_SHELF: shelve.Shelf | None = None
+
+
+def _text_key(text: str) -> str:
+    return hashlib.blake2b(f"{MODEL}\0{text}".encode()).hexdigest()
+
+
+def _analysis_shelf() -> shelve.Shelf | None:
+    """Open the persistent analysis cache on first use"""
+    global _ANALYSIS_SHELF
+    if _ANALYSIS_SHELF is None and ANALYSIS_CACHE_PATH:
+        os.makedirs(os.path.dirname(ANALYSIS_CACHE_PATH), exist_ok=True)
+        _ANALYSIS_SHELF = shelve.open(ANALYSIS_CACHE_PATH)
+        atexit.register(_ANALYSIS_SHELF.close)
+    return _ANALYSIS_SHELF
+
+
+def _cached_analysis(key: str) -> dict | None:
+    """Look up an analysis result in memory, then in the persistent cache"""
+    result = _ANALYSIS_CACHE.get(key)
+    if result is None:
+        shelf = _analysis_shelf()
+        if shelf is not None:
+            result = shelf.get(key)
+            if result is not None:
+                _ANALYSIS_CACHE[key] = result
+    return result
+
+
+def _store_analysis(key: str, result: dict):
+    _ANALYSIS_CACHE[key] = result
+    shelf = _analysis_shelf()
+    if shelf is not None:
+        shelf[key] = result
+
+
+_CLIENT: AsyncOpenAI | None = None
+_CLIENT_LOOP: asyncio.AbstractEventLoop | None = None
+
+# Keep-alive pool for the client: idle connections stay open for a minute so
+# agent turns and analysis calls reuse them instead of reconnecting. The Limits
+# type comes from the SDK so this works with whichever httpx package it uses.
+# Timeouts stay at the SDK default: run_review and full analysis chunks send
+# nothing back until the whole response is generated, which can take minutes.
+_HTTP_LIMITS = type(DEFAULT_CONNECTION_LIMITS)(
+    max_keepalive_connections=20, max_connections=40, keepalive_expiry=60.0
+)
+
+
+def _client() -> AsyncOpenAI:
+    """
+    Return the shared AsyncOpenAI client so its connection pool stays warm between
+    calls. An async client belongs to the event loop it was first used on, so a
+    new one is made if the agent is started again under a different loop.
+    """
+    global _CLIENT, _CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _CLIENT is None or _CLIENT_LOOP is not loop:
+        # Rate-limited (429) requests are retried by the SDK with exponential
+        # backoff, honouring the server's retry-after
+        _CLIENT = AsyncOpenAI(
+            http_client=DefaultAsyncHttpxClient(limits=_HTTP_LIMITS),
+            max_retries=5
+        )
+        _CLIENT_LOOP = loop
+    return _CLIENT
+
+
+# Local spellcheck prefilter. Most text in a finished deck is clean, so texts
+# whose words are all in the dictionary and that pass a few grammar checks are
+# reported clean without asking the model.
+_SPELLER: Any = None
+_SPELLER_LOCK = threading.Lock()
+_WORD_RE = re.compile(r"[A-Za-z']+")
+# Double spaces and doubled words ("the the")
+_GRAMMAR_SUSPECT_RE = re.compile(r"\S {2,}\S|\b(\w+)\s+\1\b", re.IGNORECASE)
+
+
+def _speller():
+    """Load the symspellpy dictionary on first use; None when the prefilter is off"""
+    global _SPELLER
+    if not LOCAL_SPELLCHECK or SymSpell is None:
+        return None
+    with _SPELLER_LOCK:
+        if _SPELLER is None:
+            speller = SymSpell(max_dictionary_edit_distance=2)
+            dictionary = importlib.resources.files("symspellpy") / "frequency_dictionary_en_82_765.txt"
+            with importlib.resources.as_file(dictionary) as path:
+                speller.load_dictionary(str(path), term_index=0, count_index=1)
+            _SPELLER = speller
+    return _SPELLER
+
+
+async def _load_speller():
+    """
+    Load the dictionary in a worker thread. Building it takes a couple of
+    seconds, which would otherwise stall every stream and request in flight.
+    """
+    if _SPELLER is None and LOCAL_SPELLCHECK and SymSpell is not None:
+        await asyncio.to_thread(_speller)
+
+
+def _prefilter(text: str) -> list[str] | None:
+    """
+    Check text locally. Returns None when it is clean and needs no model call,
+    otherwise the words the dictionary doesn't know with their closest
+    suggestion (possibly none), to pass to the model as hints.
+    """
+    speller = _speller()
+    if speller is None:
+        return []
+    
+    suspects = []
+    for word in _WORD_RE.findall(text):
+        word = word.strip("'")
+        if word.endswith("'s"):
+            word = word[:-2]
+        # Skip single letters and acronyms or product names like "API" and "iPhone"
+        if len(word) < 2 or any(c.isupper() for c in word[1:]):
+            continue
+        if word.lower() in speller.words:
+            continue
+        suggestions = speller.lookup(word.lower(), Verbosity.TOP, max_edit_distance=2)
+        suspects.append(f"{word} -> {suggestions[0].term}" if suggestions else word)
+    
+    balanced = text.count('"') % 2 == 0 and text.count("(") == text.count(")")
+    if not suspects and balanced and not _GRAMMAR_SUSPECT_RE.search(text):
+        return None
+    return suspects
+
+
+def _clean_result(text: str) -> dict:
+    """Analysis result for text the local prefilter found clean"""
+    return {"has_errors": False, "corrected_text": text, "errors_found": []}
+
+
+async def tool_analyze_text_for_errors(state: AgentState, slide_number: int, text: str) -> dict:
     """
     Use GPT to analyze a specific text for spelling and grammar errors.
     Returns suggested corrections with reasoning.
     """
-    client = OpenAI()
+    key = _text_key(text)
+    cached = _cached_analysis(key)
+    if cached is not None:
+        return dict(cached)
+    
+    await _load_speller()
+    hints = _prefilter(text)
+    if hints is None:
+        return _clean_result(text)
+    
+    prompt = f"Analyze this text from slide {slide_number}:\n\n\"{text}\""
+    if hints:
+        prompt += f"\n\nA spellchecker did not recognise: {', '.join(hints)}"
     
-    response = client.chat.completions.create(
+    client = _client()
+    
+    response = await client.chat.completions.create(
         model=MODEL,
         messages=[
             {
@@ -170,15 +386,206 @@ Do NOT change meaning or rewrite for style."""
             },
             {
                 "role": "user",
-                "content": f"Analyze this text from slide {slide_number}:\n\n\"{text}\""
+                "content": prompt
             }
         ],
         response_format={"type": "json_object"},
         temperature=0.1
     )
     
-    result = json.loads(response.choices[0].message.content)
-    return result
+    result = orjson.loads(response.choices[0].message.content)
+    _store_analysis(key, result)
+    return dict(result)
+
+
+BATCH_PROOFREAD_PROMPT = """You are a professional proofreader. You will receive a JSON array of items,
+each with an "id", a "slide" number and a "text". Analyze every text for:
+1. Spelling errors
+2. Grammar errors
+3. Punctuation issues
+4. Awkward phrasing
+
+Return JSON with this structure, one result per input item:
+{
+    "results": [
+        {
+            "id": "the item id",
+            "has_errors": true/false,
+            "corrected_text": "the corrected text",
+            "errors_found": [
+                {"type": "spelling|grammar|punctuation", "original": "wrong", "correction": "right", "explanation": "why"}
+            ]
+        }
+    ]
+}
+
+Some items also carry "suspect_words": words a spellchecker did not recognise, with its closest
+suggestion. Treat them as hints only - they may be correct technical terms or names.
+
+Be conservative - only flag clear errors. Preserve technical terms and intentional stylistic choices.
+Do NOT change meaning or rewrite for style."""
+
+def _chunk_items(items: list[dict], parts: int = 1) -> list[list[dict]]:
+    """
+    Split items into request-sized chunks of roughly BATCH_CHAR_BUDGET characters.
+    With parts > 1, smaller decks are also split into about that many chunks so
+    the requests can run side by side instead of one long response.
+    """
+    budget = min(BATCH_CHAR_BUDGET, -(-sum(len(item["text"]) for item in items) // parts))
+    chunks = []
+    current = []
+    size = 0
+    for item in items:
+        if current and size + len(item["text"]) > budget:
+            chunks.append(current)
+            current = []
+            size = 0
+        current.append(item)
+        size += len(item["text"])
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _proofread_request(chunk: list[dict]) -> dict:
+    """Chat completion arguments for proofreading one chunk of items"""
+    return {
+        "model": MODEL,
+        "messages": [
+            {"role": "system", "content": BATCH_PROOFREAD_PROMPT},
+            {
+                "role": "user",
+                "content": _dumps([
+                    {k: item[k] for k in ("id", "slide", "text", "suspect_words") if k in item}
+                    for item in chunk
+                ])
+            }
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": 0.1
+    }
+
+
+async def _analyze_chunks(chunks: list[list[dict]]) -> list[list[dict]]:
+    """
+    Send the chunks to GPT concurrently, at most ANALYSIS_WORKERS at a time,
+    and return each chunk's results
+    """
+    client = _client()
+    workers = asyncio.Semaphore(ANALYSIS_WORKERS)
+    
+    async def analyze(chunk):
+        async with workers:
+            return await client.chat.completions.create(**_proofread_request(chunk))
+    
+    responses = await asyncio.gather(*(analyze(chunk) for chunk in chunks))
+    return [orjson.loads(r.choices[0].message.content).get("results", []) for r in responses]
+
+
+def _deck_items(state: AgentState) -> list[dict]:
+    """
+    Every non-blank paragraph in the deck, table cells and grouped shapes
+    included, as {id, slide, shape, text} items. Read from the shared
+    presentation so corrections already applied are reflected.
+    """
+    items = []
+    for slide_num, slide in enumerate(_get_prs(state).slides, start=1):
+        for shape, text_frame in iter_text_frames(slide.shapes):
+            for para in text_frame.paragraphs:
+                text = para.text
+                if text.strip():
+                    items.append({"id": str(len(items)), "slide": slide_num, "shape": shape.name, "text": text})
+    return items
+
+
+async def _analyze_items(items: list[dict]) -> list[dict]:
+    """
+    Analyze {id, slide, text} items in batched, concurrent requests and return
+    one result per item, in order. Texts analyzed before come from the cache,
+    and texts the local prefilter finds clean are not sent.
+    """
+    # Only send texts that have not been analyzed before and need the model.
+    # Each gets a short id for the model to echo back, mapped to its cache key here.
+    pending = {}  # short id -> item to send
+    keys_by_id = {}  # short id -> cache key
+    seen = set()
+    local = {}
+    await _load_speller()
+    for item in items:
+        key = _text_key(item["text"])
+        if key in seen or _cached_analysis(key) is not None:
+            continue
+        seen.add(key)
+        hints = _prefilter(item["text"])
+        if hints is None:
+            local[key] = _clean_result(item["text"])
+            continue
+        item_id = str(len(pending))
+        keys_by_id[item_id] = key
+        pending[item_id] = {"id": item_id, "slide": item["slide"], "text": item["text"]}
+        if hints:
+            pending[item_id]["suspect_words"] = hints
+    
+    if pending:
+        chunks = _chunk_items(list(pending.values()), parts=ANALYSIS_WORKERS)
+        for chunk_results in await _analyze_chunks(chunks):
+            for r in chunk_results:
+                key = keys_by_id.get(str(r.pop("id", "")))
+                if key is not None:
+                    _store_analysis(key, r)
+    
+    results = []
+    for item in items:
+        key = _text_key(item["text"])
+        cached = local.get(key) or _cached_analysis(key)
+        if cached is None:
+            # Not checked, so don't report it as clean
+            cached = {"has_errors": None, "corrected_text": item["text"], "errors_found": [],
+                      "error": "No result returned for this item"}
+        result = {"id": item["id"], "slide": item["slide"]}
+        if "shape" in item:
+            result["shape"] = item["shape"]
+        result.update(cached)
+        results.append(result)
+    return results
+
+
+async def tool_analyze_texts_for_errors_batch(state: AgentState, items: list[dict]) -> dict:
+    """
+    Use GPT to analyze many texts for spelling and grammar errors at once.
+    Items are {id, slide, text} dicts; analyze_all_texts checks the whole deck.
+    Texts are packed into a few large requests that are sent concurrently.
+    """
+    return {"results": await _analyze_items(items)}
+
+
+def _flatten_errors(results: list[dict]) -> list[dict]:
+    """One {id, slide, shape, original, corrected, type, reasoning} entry per error found"""
+    errors = []
+    for result in results:
+        for error in result.get("errors_found", []):
+            errors.append({
+                "id": result["id"],
+                "slide": result["slide"],
+                "shape": result["shape"],
+                "original": error.get("original"),
+                "corrected": error.get("correction"),
+                "type": error.get("type"),
+                "reasoning": error.get("explanation")
+            })
+    return errors
+
+
+async def tool_analyze_all_texts(state: AgentState) -> dict:
+    """
+    Check every text in the presentation in one batched pass.
+    Returns a flat list of errors with the slide, shape, original and corrected
+    text each add_correction call needs.
+    """
+    items = _deck_items(state)
+    errors = _flatten_errors(await _analyze_items(items))
+    state.found_errors = errors
+    return {"texts_checked": len(items), "errors": errors}
 
 
 def tool_analyze_alignment(state: AgentState) -> dict:
@@ -186,32 +593,27 @@ def tool_analyze_alignment(state: AgentState) -> dict:
     Analyze alignment consistency across all slides.
     Returns recommendations for standardization.
     """
-    prs = Presentation(state.presentation_path)
+    prs = _get_prs(state)
     
     # Collect title positions
     title_positions = []
     for slide_idx, slide in enumerate(prs.slides):
         for shape in slide.shapes:
-            if "Title" in shape.name:
+            if is_title_shape(shape):
+                left, top, _, _ = get_shape_geometry(shape)
                 title_positions.append({
                     "slide": slide_idx + 1,
                     "name": shape.name,
-                    "left": shape.left,
-                    "top": shape.top
+                    "left": left,
+                    "top": top
                 })
     
     # Find inconsistencies
     if not title_positions:
         return {"has_issues": False, "message": "No titles found"}
     
-    # Count left positions
-    left_counts = {}
-    for pos in title_positions:
-        left = pos["left"]
-        left_counts[left] = left_counts.get(left, 0) + 1
-    
-    # Most common position
-    most_common_left = max(left_counts.items(), key=lambda x: x[1])[0]
+    # Most common left position
+    most_common_left = Counter(pos["left"] for pos in title_positions).most_common(1)[0][0]
     
     # Find misaligned
     misaligned = [p for p in title_positions if p["left"] != most_common_left]
@@ -229,7 +631,16 @@ def tool_add_correction(state: AgentState, slide_number: int, shape_name: str,
                         correction_type: str, reasoning: str) -> dict:
     """
     Add a correction to the pending corrections list.
+    A correction for the same original text in the same shape is only queued once.
     """
+    key = (slide_number, shape_name, original_text)
+    if key in state.correction_keys:
+        return {
+            "status": "duplicate_ignored",
+            "message": f"A correction for '{original_text}' in {shape_name} on slide {slide_number} is already queued"
+        }
+    state.correction_keys.add(key)
+    
     correction = Correction(
         slide_number=slide_number,
         shape_name=shape_name,
@@ -255,75 +666,129 @@ def tool_add_correction(state: AgentState, slide_number: int, shape_name: str,
 def tool_apply_all_corrections(state: AgentState) -> dict:
     """
     Apply all pending corrections to the presentation and save it.
+    Only corrections that changed the presentation count as applied; the rest
+    are reported back as not found.
     """
     if not state.pending_corrections:
         return {"status": "no_corrections", "message": "No corrections to apply"}
     
-    prs = Presentation(state.presentation_path)
+    prs = _get_prs(state)
     applied = []
+    matched = set()  # ids of the corrections that changed something
     
+    # Index shapes by (slide index, name) once instead of scanning each slide per correction.
+    # Text frames include table cells and grouped shapes, filed under their shape's name.
+    shapes_by_key = {}
+    frames_by_key = {}
+    for slide_idx, slide in enumerate(prs.slides):
+        for shape in slide.shapes:
+            shapes_by_key.setdefault((slide_idx, shape.name), []).append(shape)
+        for shape, text_frame in iter_text_frames(slide.shapes):
+            frames_by_key.setdefault((slide_idx, shape.name), []).append(text_frame)
+    
+    # Group corrections per shape so each shape's runs are walked once
+    groups = {}
     for correction in state.pending_corrections:
-        slide_idx = correction.slide_number - 1
-        if slide_idx < 0 or slide_idx >= len(prs.slides):
+        key = (correction.slide_number - 1, correction.shape_name)
+        groups.setdefault(key, []).append(correction)
+    
+    for key, corrections in groups.items():
+        text_corrections = []
+        for correction in corrections:
+            # Handle alignment corrections
+            if correction.correction_type == "alignment":
+                try:
+                    new_left = int(correction.corrected_text)
+                except ValueError:
+                    continue
+                for shape in shapes_by_key.get(key, []):
+                    shape.left = new_left
+                    matched.add(id(correction))
+                    applied.append({
+                        "slide": correction.slide_number,
+                        "type": "alignment",
+                        "shape": correction.shape_name
+                    })
+            else:
+                text_corrections.append(correction)
+        
+        # Handle text corrections: one alternation per shape, applied once per run
+        by_original = {}
+        for correction in text_corrections:
+            if correction.original_text:
+                by_original.setdefault(correction.original_text, correction)
+        if not by_original:
             continue
+        pattern = re.compile("|".join(
+            re.escape(original) for original in sorted(by_original, key=len, reverse=True)
+        ))
         
-        slide = prs.slides[slide_idx]
+        hits = {}
         
-        for shape in slide.shapes:
-            if shape.name == correction.shape_name:
-                # Handle alignment corrections
-                if correction.correction_type == "alignment":
-                    try:
-                        new_left = int(correction.corrected_text)
-                        shape.left = new_left
-                        applied.append({
-                            "slide": correction.slide_number,
-                            "type": "alignment",
-                            "shape": correction.shape_name
-                        })
-                    except ValueError:
-                        pass
-                
-                # Handle text corrections
-                elif shape.has_text_frame:
-                    for para in shape.text_frame.paragraphs:
-                        for run in para.runs:
-                            if correction.original_text in run.text:
-                                run.text = run.text.replace(
-                                    correction.original_text, 
-                                    correction.corrected_text
-                                )
-                                applied.append({
-                                    "slide": correction.slide_number,
-                                    "type": correction.correction_type,
-                                    "original": correction.original_text,
-                                    "corrected": correction.corrected_text
-                                })
-    
-    # Save the corrected presentation
-    prs.save(state.output_path)
+        def replace(match):
+            correction = by_original[match.group(0)]
+            hits[correction.original_text] = correction
+            return correction.corrected_text
+        
+        runs = [run for text_frame in frames_by_key.get(key, [])
+                for para in text_frame.paragraphs for run in para.runs]
+        for run in runs:
+            text = run.text
+            # Cheap substring check before running the regex
+            if not any(original in text for original in by_original):
+                continue
+            hits.clear()
+            run.text = pattern.sub(replace, text)
+            for correction in hits.values():
+                matched.add(id(correction))
+                applied.append({
+                    "slide": correction.slide_number,
+                    "type": correction.correction_type,
+                    "original": correction.original_text,
+                    "corrected": correction.corrected_text
+                })
     
-    state.applied_corrections.extend(state.pending_corrections)
+    not_found = [
+        {"slide": c.slide_number, "shape": c.shape_name, "original": c.original_text}
+        for c in state.pending_corrections if id(c) not in matched
+    ]
+    applied_corrections = [c for c in state.pending_corrections if id(c) in matched]
     state.pending_corrections = []
     
-    return {
+    # Nothing changed in the presentation, so there is nothing to save
+    if not applied:
+        return {
+            "status": "no_changes",
+            "message": "None of the pending corrections matched the presentation; nothing was saved",
+            "not_found": not_found
+        }
+    
+    # Save the corrected presentation
+    save_presentation(prs, state.output_path)
+    state.applied_corrections.extend(applied_corrections)
+    
+    result = {
         "status": "success",
         "corrections_applied": len(applied),
         "details": applied,
         "output_file": state.output_path
     }
+    if not_found:
+        result["not_found"] = not_found
+    return result
 
 
 def tool_mark_complete(state: AgentState) -> dict:
     """
     Mark the agent task as complete.
+    Raises AgentDone so the rest of the turn's tool calls are not run.
     """
     state.is_complete = True
-    return {
+    raise AgentDone({
         "status": "complete",
         "total_corrections": len(state.applied_corrections),
         "output_file": state.output_path
-    }
+    })
 
 
 # ============================================================================
@@ -337,19 +802,56 @@ TOOLS = {
         "parameters": {
             "type": "object",
             "properties": {},
-            "required": []
+            "required": [],
+            "additionalProperties": False
         }
     },
     "analyze_text_for_errors": {
         "function": tool_analyze_text_for_errors,
-        "description": "Use AI to analyze specific text for spelling and grammar errors",
+        "description": "Use AI to analyze one specific text for spelling and grammar errors. To check several texts, make one analyze_texts_for_errors_batch call instead",
         "parameters": {
             "type": "object",
             "properties": {
                 "slide_number": {"type": "integer", "description": "The slide number"},
                 "text": {"type": "string", "description": "The text to analyze"}
             },
-            "required": ["slide_number", "text"]
+            "required": ["slide_number", "text"],
+            "additionalProperties": False
+        }
+    },
+    "analyze_all_texts": {
+        "function": tool_analyze_all_texts,
+        "description": "Check every text in the presentation for spelling and grammar errors in one call and list the errors found",
+        "parameters": {
+            "type": "object",
+            "properties": {},
+            "required": [],
+            "additionalProperties": False
+        }
+    },
+    "analyze_texts_for_errors_batch": {
+        "function": tool_analyze_texts_for_errors_batch,
+        "description": "Use AI to analyze several specific texts for spelling and grammar errors in one call. To check every text in the presentation, call analyze_all_texts instead",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "items": {
+                    "type": "array",
+                    "description": "The texts to analyze",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "id": {"type": "string", "description": "An identifier echoed back in the results"},
+                            "slide": {"type": "integer", "description": "The slide number"},
+                            "text": {"type": "string", "description": "The text to analyze"}
+                        },
+                        "required": ["id", "slide", "text"],
+                        "additionalProperties": False
+                    }
+                }
+            },
+            "required": ["items"],
+            "additionalProperties": False
         }
     },
     "analyze_alignment": {
@@ -358,7 +860,8 @@ TOOLS = {
         "parameters": {
             "type": "object",
             "properties": {},
-            "required": []
+            "required": [],
+            "additionalProperties": False
         }
     },
     "add_correction": {
@@ -374,7 +877,8 @@ TOOLS = {
                 "correction_type": {"type": "string", "enum": ["spelling", "grammar", "alignment", "formatting"]},
                 "reasoning": {"type": "string", "description": "Why this correction is needed"}
             },
-            "required": ["slide_number", "shape_name", "original_text", "corrected_text", "correction_type", "reasoning"]
+            "required": ["slide_number", "shape_name", "original_text", "corrected_text", "correction_type", "reasoning"],
+            "additionalProperties": False
         }
     },
     "apply_all_corrections": {
@@ -383,7 +887,8 @@ TOOLS = {
         "parameters": {
             "type": "object",
             "properties": {},
-            "required": []
+            "required": [],
+            "additionalProperties": False
         }
     },
     "mark_complete": {
@@ -392,52 +897,327 @@ TOOLS = {
         "parameters": {
             "type": "object",
             "properties": {},
-            "required": []
+            "required": [],
+            "additionalProperties": False
         }
     }
 }
 
 
-def get_openai_tools():
-    """Convert tool registry to OpenAI function calling format"""
-    return [
-        {
-            "type": "function",
-            "function": {
-                "name": name,
-                "description": tool["description"],
-                "parameters": tool["parameters"]
-            }
+# Signatures used by _call_tool to check the model's arguments before calling
+for _tool in TOOLS.values():
+    _tool["signature"] = inspect.signature(_tool["function"])
+
+# Tool registry in OpenAI function calling format, built once at import
+_OPENAI_TOOLS = tuple(
+    {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": tool["description"],
+            "parameters": tool["parameters"]
         }
-        for name, tool in TOOLS.items()
-    ]
+    }
+    for name, tool in TOOLS.items()
+)
+
+
+def get_openai_tools():
+    """Return the tool registry in OpenAI function calling format"""
+    return _OPENAI_TOOLS
 
 
 # ============================================================================
 # AGENT CORE
 # ============================================================================
 
+REVIEW_RULES = """IMPORTANT RULES:
+- Only fix clear spelling and grammar errors
+- Do NOT change technical terms or business jargon
+- Do NOT rewrite for style - only fix actual errors
+- Preserve original meaning
+- Be thorough - check ALL text on ALL slides"""
+
 SYSTEM_PROMPT = """You are a PowerPoint Review Agent. Your job is to review and correct PowerPoint presentations.
 
 Your workflow:
 1. First, call extract_slide_content to get all the text from the presentation
-2. For each piece of text, call analyze_text_for_errors to check for spelling/grammar issues
+2. Call analyze_all_texts once to check all text for spelling/grammar issues;
+   use analyze_text_for_errors only to re-check a single piece of text
 3. Call analyze_alignment to check for alignment inconsistencies
 4. For each error found, call add_correction to queue the fix
 5. Once all errors are identified, call apply_all_corrections to save the fixed presentation
 6. Finally, call mark_complete to finish
 
-IMPORTANT RULES:
-- Only fix clear spelling and grammar errors
-- Do NOT change technical terms or business jargon
-- Do NOT rewrite for style - only fix actual errors
-- Preserve original meaning
-- Be thorough - check ALL text on ALL slides
+""" + REVIEW_RULES + """
 
 Process each slide systematically. After analyzing all content and applying corrections, mark the task complete."""
 
+# Every run starts from this same message object and the same tool tuple, so
+# the prompt prefix is byte-identical on each turn and OpenAI's prompt caching
+# applies to it. Neither is modified after import.
+_SYSTEM_MSG = {"role": "system", "content": SYSTEM_PROMPT}
+
+REVIEW_PROMPT = """You are a PowerPoint reviewer. You will receive a JSON array with every text in a
+presentation, each with its "slide" number, "shape" name and "text".
+
+Return every correction needed. For each one give the slide number and shape name it belongs to,
+the exact wrong text as original_text (just the wrong word or phrase, copied exactly), and its
+replacement as corrected_text.
+
+""" + REVIEW_RULES
+
+# Structured output schema for run_review: the full list of corrections in one response
+CORRECTIONS_SCHEMA = {
+    "name": "corrections",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "corrections": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "slide_number": {"type": "integer"},
+                        "shape_name": {"type": "string"},
+                        "original_text": {"type": "string"},
+                        "corrected_text": {"type": "string"},
+                        "correction_type": {"type": "string", "enum": ["spelling", "grammar", "formatting"]},
+                        "reasoning": {"type": "string"}
+                    },
+                    "required": ["slide_number", "shape_name", "original_text", "corrected_text",
+                                 "correction_type", "reasoning"],
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["corrections"],
+        "additionalProperties": False
+    }
+}
+
 
-def run_agent(presentation_path: str, output_path: str) -> dict:
+def _call_tool(state: AgentState, tool_name: str, tool_args: dict) -> Any:
+    """
+    Call a tool with the model's arguments as keywords; coroutine tools
+    return an awaitable. Arguments that don't fit the tool's signature
+    come back to the model as an error instead of raising.
+    """
+    tool = TOOLS.get(tool_name)
+    if tool is None:
+        return {"error": f"Tool not found: {tool_name}"}
+    
+    try:
+        tool["signature"].bind(state, **tool_args)
+    except TypeError as e:
+        return {"error": f"Bad arguments for {tool_name}: {e}"}
+    return tool["function"](state, **tool_args)
+
+
+# Result recorded for tool calls dropped because mark_complete already ran;
+# every tool_call_id still needs a tool message for the transcript to be valid
+_SKIPPED = {"status": "skipped", "message": "The review was already marked complete"}
+
+
+def _is_concurrent(tool_name: str) -> bool:
+    """Coroutine tools (the GPT analysis calls) don't change agent state and may run side by side"""
+    tool = TOOLS.get(tool_name)
+    return tool is not None and inspect.iscoroutinefunction(tool["function"])
+
+
+class _ToolDispatcher:
+    """
+    Runs one turn's tool calls, keyed by their index in the model's response.
+    Coroutine tools run concurrently. The other tools change agent state, so
+    each waits for the one started before it; callers start those in index
+    order. They run in a worker thread so the event loop keeps serving the
+    analysis requests meanwhile.
+    Once mark_complete raises AgentDone, calls still in flight are cancelled
+    and later ones are skipped.
+    """
+    
+    def __init__(self, state: AgentState):
+        self.state = state
+        self.tasks: dict[int, asyncio.Task] = {}
+        self.done = False
+        self._last_in_order: asyncio.Task | None = None
+    
+    def start(self, index: int, tool_name: str, tool_args: dict):
+        if _is_concurrent(tool_name):
+            async def run():
+                if self.done:
+                    return dict(_SKIPPED)
+                result = _call_tool(self.state, tool_name, tool_args)
+                return await result if inspect.isawaitable(result) else result
+            
+            task = asyncio.create_task(run())
+        else:
+            previous = self._last_in_order
+            
+            async def run():
+                if previous is not None:
+                    await asyncio.wait([previous])
+                if self.done:
+                    return dict(_SKIPPED)
+                try:
+                    return await asyncio.to_thread(_call_tool, self.state, tool_name, tool_args)
+                except AgentDone as done:
+                    self._finish()
+                    return done.result
+            
+            task = self._last_in_order = asyncio.create_task(run())
+        self.tasks[index] = task
+    
+    def _finish(self):
+        """Stop the turn's other calls once mark_complete has run"""
+        self.done = True
+        current = asyncio.current_task()
+        for task in self.tasks.values():
+            if task is not current:
+                task.cancel()
+    
+    async def results(self) -> list[dict]:
+        """Wait for every started call and return the results in index order"""
+        if self.tasks:
+            await asyncio.wait(self.tasks.values())
+        return [
+            dict(_SKIPPED) if task.cancelled() else task.result()
+            for _, task in sorted(self.tasks.items())
+        ]
+
+
+async def _stream_turn(state: AgentState, stream) -> tuple[dict, list[dict]]:
+    """
+    Read one streamed model turn. Each tool call is started once its arguments
+    form complete JSON, so tools run while the rest of the response is still
+    being generated. State-changing tools are held back until every call
+    before them has started, so they run in the order the model asked.
+    Returns the assistant message and the tool results in call order.
+    """
+    content = []
+    # Tool calls by stream index, accumulated directly in the shape the API
+    # expects back, so the assistant message reuses them as they are
+    calls = {}
+    ready = {}  # stream index -> parsed arguments of calls not started yet
+    started = set()
+    next_index = 0  # lowest index not started yet
+    dispatcher = _ToolDispatcher(state)
+    
+    def dispatch(index, tool_args):
+        function = calls[index]["function"]
+        started.add(index)
+        dispatcher.start(index, function["name"], tool_args)
+        logger.debug("  Tool: %s", function["name"])
+        if tool_args:
+            # Preview the raw argument JSON rather than re-formatting the parsed dict
+            logger.debug("  Args: %s...", function["arguments"][:200])
+    
+    def release():
+        nonlocal next_index
+        for index in [i for i in ready if _is_concurrent(calls[i]["function"]["name"])]:
+            dispatch(index, ready.pop(index))
+        while next_index in ready or next_index in started:
+            if next_index in ready:
+                dispatch(next_index, ready.pop(next_index))
+            next_index += 1
+    
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        if delta.content:
+            content.append(delta.content)
+        for tool_call in delta.tool_calls or ():
+            call = calls.get(tool_call.index)
+            if call is None:
+                call = calls[tool_call.index] = {
+                    "id": None, "type": "function", "function": {"name": "", "arguments": ""}
+                }
+            if tool_call.id:
+                call["id"] = tool_call.id
+            function = call["function"]
+            if tool_call.function:
+                function["name"] += tool_call.function.name or ""
+                function["arguments"] += tool_call.function.arguments or ""
+            index = tool_call.index
+            if index not in started and index not in ready and function["arguments"].rstrip().endswith("}"):
+                try:
+                    ready[index] = orjson.loads(function["arguments"])
+                except orjson.JSONDecodeError:
+                    continue  # a "}" inside the arguments, not the end of them
+                release()
+    
+    # Calls whose arguments never parsed early (e.g. empty) are ready now
+    for index, call in calls.items():
+        if index not in started and index not in ready:
+            function = call["function"]
+            function["arguments"] = function["arguments"] or "{}"
+            ready[index] = orjson.loads(function["arguments"])
+    release()
+    # Any gap in the stream's indexes must not hold back the calls after it
+    for index in sorted(ready):
+        dispatch(index, ready.pop(index))
+    
+    message = {"role": "assistant", "content": "".join(content) or None}
+    if calls:
+        message["tool_calls"] = [calls[index] for index in sorted(calls)]
+    return message, await dispatcher.results()
+
+
+def _history_summary(state: AgentState) -> dict:
+    """
+    Condense the corrections made so far, and the errors found but not yet
+    queued, into one message standing in for trimmed history
+    """
+    lines = [
+        f"- Slide {c.slide_number}, {c.shape_name}: '{c.original_text}' -> '{c.corrected_text}' (applied)"
+        for c in state.applied_corrections
+    ]
+    lines.extend(
+        f"- Slide {c.slide_number}, {c.shape_name}: '{c.original_text}' -> '{c.corrected_text}' (queued)"
+        for c in state.pending_corrections
+    )
+    lines.extend(
+        f"- Slide {e['slide']}, {e['shape']}: '{e['original']}' -> '{e['corrected']}' (found, not queued yet)"
+        for e in state.found_errors
+        if (e["slide"], e["shape"], e["original"]) not in state.correction_keys
+    )
+    return {
+        "role": "system",
+        "content": "Prior tool results summary:\n" + ("\n".join(lines) or "No corrections yet.")
+    }
+
+
+def _trim_history(state: AgentState):
+    """
+    Keep the conversation sent to the model to HISTORY_WINDOW messages: the
+    pinned prompt, a summary of the corrections and errors so far and the
+    most recent messages. Older messages are dropped from the front of the
+    deque, a whole turn at a time, so tool results are never separated from
+    the assistant message whose tool calls they answer.
+    """
+    messages = state.messages
+    drop = len(messages) - (HISTORY_WINDOW - len(state.prompt) - 1)
+    if drop <= 0:
+        return
+    # Also drop the rest of a partly dropped turn's tool results; the summary covers them
+    while drop < len(messages) and messages[drop]["role"] == "tool":
+        drop += 1
+    
+    for _ in range(drop):
+        messages.popleft()
+    state.history_trimmed = True
+
+
+def _request_messages(state: AgentState) -> list[dict]:
+    """The messages sent to the model on the next turn"""
+    if state.history_trimmed:
+        return [*state.prompt, _history_summary(state), *state.messages]
+    return [*state.prompt, *state.messages]
+
+
+async def run_agent(presentation_path: str, output_path: str) -> dict:
     """
     Run the PowerPoint review agent.
     
@@ -448,123 +1228,99 @@ def run_agent(presentation_path: str, output_path: str) -> dict:
     Returns:
         Summary of corrections made
     """
-    client = OpenAI()
+    client = _client()
     
     # Initialize state
     state = AgentState(
         presentation_path=presentation_path,
         output_path=output_path,
-        messages=[{"role": "system", "content": SYSTEM_PROMPT}]
+        prompt=[
+            _SYSTEM_MSG,
+            {
+                "role": "user",
+                "content": f"Please review and correct the PowerPoint presentation at: {presentation_path}\nSave the corrected version to: {output_path}"
+            }
+        ]
     )
     
-    # Initial user message
-    state.messages.append({
-        "role": "user",
-        "content": f"Please review and correct the PowerPoint presentation at: {presentation_path}\nSave the corrected version to: {output_path}"
-    })
-    
-    print("=" * 80)
-    print("POWERPOINT REVIEW AGENT")
-    print("=" * 80)
-    print(f"Input: {presentation_path}")
-    print(f"Output: {output_path}")
-    print("=" * 80)
+    logger.info("=" * 80)
+    logger.info("POWERPOINT REVIEW AGENT")
+    logger.info("=" * 80)
+    logger.info(f"Input: {presentation_path}")
+    logger.info(f"Output: {output_path}")
+    logger.info("=" * 80)
     
     # Agent loop
     while not state.is_complete and state.iteration < MAX_ITERATIONS:
         state.iteration += 1
         
-        if VERBOSE:
-            print(f"\n--- Iteration {state.iteration} ---")
+        logger.debug("\n--- Iteration %d ---", state.iteration)
         
-        # Call the LLM
-        response = client.chat.completions.create(
+        # Call the LLM, running tools as their calls stream in
+        _trim_history(state)
+        stream = await client.chat.completions.create(
             model=MODEL,
-            messages=state.messages,
-            tools=get_openai_tools(),
-            tool_choice="auto"
+            messages=_request_messages(state),
+            tools=_OPENAI_TOOLS,
+            tool_choice="auto",
+            parallel_tool_calls=True,
+            stream=True
         )
         
-        assistant_message = response.choices[0].message
-        state.messages.append(assistant_message.model_dump())
+        assistant_message, results = await _stream_turn(state, stream)
+        state.messages.append(assistant_message)
         
-        # Check if the model wants to call tools
-        if assistant_message.tool_calls:
-            for tool_call in assistant_message.tool_calls:
-                tool_name = tool_call.function.name
-                tool_args = json.loads(tool_call.function.arguments) if tool_call.function.arguments else {}
-                
-                if VERBOSE:
-                    print(f"  Tool: {tool_name}")
-                    if tool_args:
-                        print(f"  Args: {json.dumps(tool_args, indent=2)[:200]}...")
-                
-                # Execute the tool
-                if tool_name in TOOLS:
-                    tool_fn = TOOLS[tool_name]["function"]
-                    
-                    # Call tool with appropriate arguments
-                    if tool_name in ["extract_slide_content", "analyze_alignment", "apply_all_corrections", "mark_complete"]:
-                        result = tool_fn(state)
-                    elif tool_name == "analyze_text_for_errors":
-                        result = tool_fn(state, tool_args["slide_number"], tool_args["text"])
-                    elif tool_name == "add_correction":
-                        result = tool_fn(
-                            state,
-                            tool_args["slide_number"],
-                            tool_args["shape_name"],
-                            tool_args["original_text"],
-                            tool_args["corrected_text"],
-                            tool_args["correction_type"],
-                            tool_args["reasoning"]
-                        )
-                    else:
-                        result = {"error": f"Unknown tool: {tool_name}"}
-                    
-                    if VERBOSE:
-                        result_preview = json.dumps(result, indent=2)
-                        if len(result_preview) > 300:
-                            result_preview = result_preview[:300] + "..."
-                        print(f"  Result: {result_preview}")
-                else:
-                    result = {"error": f"Tool not found: {tool_name}"}
+        # Check if the model called tools
+        if assistant_message.get("tool_calls"):
+            for tool_call, result in zip(assistant_message["tool_calls"], results):
+                content = _dumps(result)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  Result: %s", content if len(content) <= 300 else content[:300] + "...")
                 
                 # Add tool result to messages
                 state.messages.append({
                     "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": json.dumps(result)
+                    "tool_call_id": tool_call["id"],
+                    "content": content
                 })
         
-        elif assistant_message.content:
-            if VERBOSE:
-                print(f"  Agent: {assistant_message.content[:200]}...")
+        elif assistant_message["content"]:
+            logger.debug("  Agent: %s...", assistant_message["content"][:200])
         
         # Check for completion
         if state.is_complete:
             break
     
-    # Summary
-    print("\n" + "=" * 80)
-    print("AGENT COMPLETED")
-    print("=" * 80)
-    print(f"Iterations: {state.iteration}")
-    print(f"Corrections Applied: {len(state.applied_corrections)}")
+    return _report(state)
+
+
+def _report(state: AgentState) -> dict:
+    """Print the run summary and return it"""
+    logger.info("\n" + "=" * 80)
+    logger.info("AGENT COMPLETED")
+    logger.info("=" * 80)
+    logger.info(f"Iterations: {state.iteration}")
+    logger.info(f"Corrections Applied: {len(state.applied_corrections)}")
     
     if state.applied_corrections:
-        print("\nCorrections:")
+        logger.info("\nCorrections:")
         for c in state.applied_corrections:
-            print(f"  - Slide {c.slide_number}, {c.shape_name}: {c.correction_type}")
-            print(f"    '{c.original_text}' -> '{c.corrected_text}'")
-            print(f"    Reason: {c.reasoning}")
+            logger.info(f"  - Slide {c.slide_number}, {c.shape_name}: {c.correction_type}")
+            logger.info(f"    '{c.original_text}' -> '{c.corrected_text}'")
+            logger.info(f"    Reason: {c.reasoning}")
     
-    print(f"\nOutput saved to: {state.output_path}")
-    print("=" * 80)
+    # Corrections only count as applied once they were saved
+    output_file = state.output_path if state.applied_corrections else None
+    if output_file:
+        logger.info(f"\nOutput saved to: {output_file}")
+    else:
+        logger.info("\nNo changes were made; no output file was written")
+    logger.info("=" * 80)
     
     return {
         "iterations": state.iteration,
         "corrections": len(state.applied_corrections),
-        "output_file": state.output_path,
+        "output_file": output_file,
         "details": [
             {
                 "slide": c.slide_number,
@@ -577,17 +1333,198 @@ def run_agent(presentation_path: str, output_path: str) -> dict:
     }
 
 
+def _layout_title_left(layout) -> Any:
+    """Left position of a slide layout's title placeholder, or None if it has none"""
+    for shape in layout.shapes:
+        if is_title_shape(shape):
+            return get_shape_geometry(shape)[0]
+    return None
+
+
+def _queue_alignment_corrections(state: AgentState):
+    """
+    Title alignment needs no model: queue the standard position for misaligned
+    titles. A title is only moved when its slide layout puts its title at that
+    position too; centred titles on title slides and titles on section or
+    picture layouts deliberately sit elsewhere and are left alone.
+    """
+    alignment = tool_analyze_alignment(state)
+    slides = _get_prs(state).slides
+    for title in alignment.get("misaligned_titles", []):
+        layout = slides[title["slide"] - 1].slide_layout
+        if _layout_title_left(layout) != alignment["standard_left_position"]:
+            continue
+        tool_add_correction(state, title["slide"], title["name"], str(title["left"]),
+                            str(alignment["standard_left_position"]), "alignment",
+                            alignment["recommendation"])
+
+
+async def run_agent_batch(presentation_path: str, output_path: str) -> dict:
+    """
+    Review the presentation through the OpenAI Batch API instead of the
+    interactive agent loop. Proofreading requests are submitted as one batch
+    job (half the cost of synchronous calls, scheduled by OpenAI), and the
+    returned errors are queued and applied locally.
+    
+    Args:
+        presentation_path: Path to the input .pptx file
+        output_path: Path for the corrected output file
+    
+    Returns:
+        Summary of corrections made
+    """
+    client = _client()
+    state = AgentState(presentation_path=presentation_path, output_path=output_path)
+    
+    logger.info("=" * 80)
+    logger.info("POWERPOINT REVIEW AGENT (BATCH)")
+    logger.info("=" * 80)
+    logger.info(f"Input: {presentation_path}")
+    logger.info(f"Output: {output_path}")
+    logger.info("=" * 80)
+    
+    items = _deck_items(state)
+    items_by_id = {item["id"]: item for item in items}
+    
+    # One request line per chunk of texts
+    lines = [
+        orjson.dumps({
+            "custom_id": f"chunk-{n}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": _proofread_request(chunk)
+        })
+        for n, chunk in enumerate(_chunk_items(items))
+    ]
+    
+    if lines:
+        batch_file = await client.files.create(
+            file=("pptx_review_batch.jsonl", b"\n".join(lines)),
+            purpose="batch"
+        )
+        batch = await client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted batch {batch.id} ({len(lines)} requests)")
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(BATCH_POLL_SECONDS)
+            batch = await client.batches.retrieve(batch.id)
+            logger.debug("  Batch status: %s", batch.status)
+        
+        if batch.status != "completed" or not batch.output_file_id:
+            logger.error(f"ERROR: batch {batch.id} ended with status {batch.status}")
+            return {"error": f"Batch ended with status {batch.status}", "batch_id": batch.id}
+        
+        output = await client.files.content(batch.output_file_id)
+        results = []
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                logger.warning(f"  Skipping {record.get('custom_id')}: {record.get('error') or response.get('status_code')}")
+                continue
+            content = response["body"]["choices"][0]["message"]["content"]
+            for r in orjson.loads(content).get("results", []):
+                # The model may echo the id back as a number
+                item = items_by_id.get(str(r.get("id")))
+                if item:
+                    results.append({**r, "slide": item["slide"], "shape": item["shape"]})
+        
+        for error in _flatten_errors(results):
+            if error["original"] and error["corrected"] is not None:
+                tool_add_correction(state, error["slide"], error["shape"], error["original"],
+                                    error["corrected"], error["type"] or "spelling", error["reasoning"] or "")
+    
+    _queue_alignment_corrections(state)
+    tool_apply_all_corrections(state)
+    state.is_complete = True
+    
+    return _report(state)
+
+
+async def run_review(presentation_path: str, output_path: str) -> dict:
+    """
+    Review the presentation with a single model call. All extracted text goes
+    out in one structured-output request that returns the complete correction
+    list, which is then queued and applied locally - no agent loop round-trips.
+    
+    Args:
+        presentation_path: Path to the input .pptx file
+        output_path: Path for the corrected output file
+    
+    Returns:
+        Summary of corrections made
+    """
+    client = _client()
+    state = AgentState(presentation_path=presentation_path, output_path=output_path)
+    
+    logger.info("=" * 80)
+    logger.info("POWERPOINT REVIEW")
+    logger.info("=" * 80)
+    logger.info(f"Input: {presentation_path}")
+    logger.info(f"Output: {output_path}")
+    logger.info("=" * 80)
+    
+    texts = [
+        {"slide": item["slide"], "shape": item["shape"], "text": item["text"]}
+        for item in _deck_items(state)
+    ]
+    
+    if texts:
+        state.iteration = 1
+        response = await client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {"role": "system", "content": REVIEW_PROMPT},
+                {"role": "user", "content": _dumps(texts)}
+            ],
+            response_format={"type": "json_schema", "json_schema": CORRECTIONS_SCHEMA},
+            temperature=0.1
+        )
+        for c in orjson.loads(response.choices[0].message.content)["corrections"]:
+            tool_add_correction(state, c["slide_number"], c["shape_name"], c["original_text"],
+                                c["corrected_text"], c["correction_type"], c["reasoning"])
+    
+    _queue_alignment_corrections(state)
+    tool_apply_all_corrections(state)
+    state.is_complete = True
+    
+    return _report(state)
+
+
 # ============================================================================
 # MAIN
 # ============================================================================
 
+def _configure_logging():
+    """
+    Send log records through a queue to a listener thread that writes them,
+    so console output never blocks the agent loop
+    """
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    listener = logging.handlers.QueueListener(records, logging.StreamHandler(sys.stdout))
+    listener.start()
+    atexit.register(listener.stop)
+    # Libraries (httpx logs every request at INFO) only report warnings; this
+    # module's own output is raised to INFO, or DEBUG when VERBOSE
+    logging.basicConfig(level=logging.WARNING, handlers=[queue_handler])
+    logger.setLevel(logging.DEBUG if VERBOSE else logging.INFO)
+
+
 def main():
-    import sys
+    _configure_logging()
     
     # Check for API key
     if not os.environ.get("OPENAI_API_KEY"):
-        print("ERROR: OPENAI_API_KEY not found")
-        print("Add it to the .env file: OPENAI_API_KEY=sk-your-key-here")
+        logger.error("ERROR: OPENAI_API_KEY not found")
+        logger.error("Add it to the .env file: OPENAI_API_KEY=sk-your-key-here")
         sys.exit(1)
     
     # Default paths
@@ -595,8 +1532,14 @@ def main():
     base_name = os.path.splitext(os.path.basename(input_path))[0]
     output_path = os.path.join(os.path.dirname(input_path), f"{base_name}_corrected.pptx")
     
-    # Run the agent
-    result = run_agent(input_path, output_path)
+    # Review with one model call by default; --interactive runs the tool-calling
+    # agent loop and --batch submits the review through the OpenAI Batch API
+    if "--batch" in sys.argv[1:]:
+        result = asyncio.run(run_agent_batch(input_path, output_path))
+    elif "--interactive" in sys.argv[1:]:
+        result = asyncio.run(run_agent(input_path, output_path))
+    else:
+        result = asyncio.run(run_review(input_path, output_path))
     
     return result
 
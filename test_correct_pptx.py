@@ -0,0 +1,24 @@
+"""
+Regression tests for correct_pptx spell checking
+"""
+import unittest
+
+from correct_pptx import simple_spell_check
+
+class SimpleSpellCheckTest(unittest.TestCase):
+    def test_case_folded_word_variants(self):
+        # IGNORECASE matches these even though their lowercase form is not a fix key
+        cases = {
+            "This iſs bad": "This is bad",
+            "wıh": "with",
+            "Wİh them": "with them",
+            "teſtss": "tests",
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                corrected, corrections = simple_spell_check(text)
+                self.assertEqual(corrected, expected)
+                self.assertTrue(corrections)
+
+if __name__ == "__main__":
+    unittest.main()